@@ -2,16 +2,24 @@
 """
 Wrapper around os.environ with django config value parsers
 """
-from urllib.parse import urlparse, urlunparse, parse_qs, unquote_plus
+from functools import lru_cache
+from types import MappingProxyType
+from urllib.parse import urlparse, unquote_plus
 
 from django.core.exceptions import ImproperlyConfigured
-from django.utils.encoding import smart_str
 from envex import Env
 
+try:
+    # django-class-settings is an optional dependency
+    # noinspection PyUnresolvedReferences
+    from class_settings.env import DeferredEnv
+except ImportError:
+    DeferredEnv = None
+
 DEFAULT_DATABASE_ENV = 'DATABASE_URL'
 DJANGO_POSTGRES = 'django.db.backends.postgresql'
 MYSQL_DRIVER = 'django.db.backends.mysql'
-DB_SCHEMES = {
+DB_SCHEMES = MappingProxyType({
     'postgres': DJANGO_POSTGRES,
     'postgresql': DJANGO_POSTGRES,
     'psql': DJANGO_POSTGRES,
@@ -28,16 +36,25 @@ DB_SCHEMES = {
     'spatialite': 'django.contrib.gis.db.backends.spatialite',
     'sqlite': 'django.db.backends.sqlite3',
     'ldap': 'ldapdb.backends.ldap',
-}
-_DB_BASE_OPTIONS = [
+})
+_SQLITE_MEMORY_CONFIG = MappingProxyType({
+    'ENGINE': DB_SCHEMES['sqlite'],
+    'NAME': ':memory:',
+})
+_PG_SCHEMA_ENGINES = frozenset((
+    'django.contrib.gis.db.backends.postgis',
+    'django.db.backends.postgresql_psycopg2',
+    'django_redshift_backend',
+))
+_DB_BASE_OPTIONS = frozenset((
     'CONN_MAX_AGE', 'ATOMIC_REQUESTS', 'AUTOCOMMIT', 'SSLMODE', 'TEST',
     # extensions
     'READ_ONLY', 'READONLY', 'HTTP_METHODS', 'HTTP_WRITE_PATHS', 'HTTP_WRITE_STICKY'
-]
+))
 
 DEFAULT_CACHE_ENV = 'CACHE_URL'
 REDIS_CACHE = 'django_redis.cache.RedisCache'
-CACHE_SCHEMES = {
+CACHE_SCHEMES = MappingProxyType({
     'dbcache': 'django.core.cache.backends.db.DatabaseCache',
     'dummycache': 'django.core.cache.backends.dummy.DummyCache',
     'filecache': 'django.core.cache.backends.filebased.FileBasedCache',
@@ -46,13 +63,14 @@ CACHE_SCHEMES = {
     'pymemcache': 'django.core.cache.backends.memcached.PyLibMCCache',
     'rediscache': REDIS_CACHE,
     'redis': REDIS_CACHE,
-}
-_CACHE_BASE_OPTIONS = ['TIMEOUT', 'KEY_PREFIX', 'VERSION', 'KEY_FUNCTION', 'BINARY']
+})
+_CACHE_UNIX_SCHEMES = frozenset(('unix', 'memcache', 'pymemcache'))
+_CACHE_BASE_OPTIONS = frozenset(('TIMEOUT', 'KEY_PREFIX', 'VERSION', 'KEY_FUNCTION', 'BINARY'))
 
 DEFAULT_EMAIL_ENV = 'EMAIL_URL'
 EMAIL_AMAZON_SES = 'django_ses.SESBackend'
 EMAIL_SMTP = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_SCHEMES = {
+EMAIL_SCHEMES = MappingProxyType({
     'smtp': EMAIL_SMTP,
     'smtps': EMAIL_SMTP,
     'smtp+tls': EMAIL_SMTP,
@@ -63,21 +81,27 @@ EMAIL_SCHEMES = {
     'dummymail': 'django.core.mail.backends.dummy.EmailBackend',
     'amazonses': EMAIL_AMAZON_SES,
     'amazon-ses': EMAIL_AMAZON_SES,
-}
-_EMAIL_BASE_OPTIONS = ['EMAIL_USE_TLS', 'EMAIL_USE_SSL']
+})
+_EMAIL_SECURE_SCHEMES = MappingProxyType({
+    'smtps': 'EMAIL_USE_TLS',
+    'smtp+tls': 'EMAIL_USE_TLS',
+    'smtp+ssl': 'EMAIL_USE_SSL',
+})
+_EMAIL_BASE_OPTIONS = frozenset(('EMAIL_USE_TLS', 'EMAIL_USE_SSL'))
 
 DEFAULT_SEARCH_ENV = 'SEARCH_URL'
-SEARCH_SCHEMES = {
+SEARCH_SCHEMES = MappingProxyType({
     "elasticsearch": "haystack.backends.elasticsearch_backend.ElasticsearchSearchEngine",
     "elasticsearch2": "haystack.backends.elasticsearch2_backend.Elasticsearch2SearchEngine",
     "solr": "haystack.backends.solr_backend.SolrEngine",
     "whoosh": "haystack.backends.whoosh_backend.WhooshEngine",
     "xapian": "haystack.backends.xapian_backend.XapianEngine",
     "simple": "haystack.backends.simple_backend.SimpleEngine",
-}
+})
+_ELASTIC_SCHEMES = frozenset(('elasticsearch', 'elasticsearch2'))
 
 DEFAULT_QUEUE_ENV = 'QUEUE_URL'
-QUEUE_SCHEMES = {
+QUEUE_SCHEMES = MappingProxyType({
     'rabbitmq': {
         'backend': 'mq.backends.rabbitmq_backend.create_backend',
         'default-port': 5672,
@@ -92,30 +116,195 @@ QUEUE_SCHEMES = {
     'amazon-sqs': {
         'backend': 'mq.backends.sqs_backend.create_backend',
     },
-}
-_QUEUE_BASE_OPTIONS = []
+})
+_QUEUE_BASE_OPTIONS = frozenset()
 
 _DEFAULT_ENV_PREFIX = 'DJANGO_'
 
 _DEFAULT_PREFIX = object()
 
+_MISSING = object()
+
+
+def _parse_query(query):
+    """
+    Single pass query string parser, equivalent to taking values[0] from parse_qs()
+
+    :param query: url query string
+    :return: dictionary of unquoted keys to the first non-blank value given
+    """
+    params = {}
+    for param in query.split('&'):
+        key, _, value = param.partition('=')
+        if key and value:
+            params.setdefault(unquote_plus(key), unquote_plus(value))
+    return params
+
+
+@lru_cache(maxsize=128)
+def _split_url(url):
+    """
+    Memoized parse of a url and its query string, results are read-only so
+    are safely shared between calls
+
+    :param url: url to parse
+    :return: tuple of ParseResult and read-only mapping of query parameters
+    """
+    url = urlparse(url)
+    return url, MappingProxyType(_parse_query(url.query) if url.query else {})
+
+
+def _url_path(url):
+    """
+    Path of a parsed url without its leading '/', unquoted only if it needs to be
+
+    :param url: ParseResult
+    :return: path
+    """
+    path = url.path[1:]
+    return unquote_plus(path) if '%' in path or '+' in path else path
+
+
+def _http_url(netloc, path):
+    """
+    Build an http url, as urlunparse(('http', netloc, path, '', '', '')) but without re-parsing
+
+    :param netloc: network location
+    :param path: path, with or without a leading '/'
+    :return: url
+    """
+    if path and path[0] != '/':
+        path = '/' + path
+    return f'http://{netloc}{path}'
+
+
+def _split_query(params, base_options, coerce=None):
+    """
+    Split query parameters into base settings and backend specific options
+
+    :param params: query parameters
+    :param base_options: set of (upper case) base setting names
+    :param coerce: optional conversion applied to option values as they are inserted
+    :return: tuple of base settings and options, both keyed by upper case name
+    """
+    base, options = {}, {}
+    for key, value in params.items():
+        key = key.upper()
+        if key in base_options:
+            base[key] = value
+        else:
+            options[key] = value if coerce is None else coerce(value)
+    return base, options
+
+
+def _apply_options(config, options, base_options=frozenset()):
+    """
+    Merge caller supplied options into a parsed configuration
+
+    :param config: configuration dictionary, updated in place
+    :param options: additional options
+    :param base_options: set of (upper case) names that are set in config rather than OPTIONS
+    :return: config
+    """
+    config_options = config.get('OPTIONS', {})
+    for key, value in options.items():
+        key = key.upper()
+        if key in base_options:
+            config[key] = value
+        else:
+            config_options[key] = value
+    if config_options:
+        config['OPTIONS'] = config_options
+    return config
+
+
+def _copy_config(config):
+    """
+    Copy a parsed configuration so that callers may freely modify the result
+
+    :param config: configuration dictionary
+    :return: copy of config including nested option dicts and location lists
+    """
+    return {k: v.copy() if isinstance(v, (dict, list)) else v for k, v in config.items()}
+
 
 class DjangoEnv(Env):
     """
     Wrapper around os.environ with .env enhancement and django support
     """
 
+    # envex defines this as a generator expression, which is exhausted after the first bytes value
+    _BOOLEAN_TRUE_BYTES = tuple(s.encode('utf-8') for s in Env._BOOLEAN_TRUE_STRINGS)
+
     def __init__(self, *args, **kwargs):
         self.prefix = kwargs.pop('prefix', _DEFAULT_ENV_PREFIX)
         exception = kwargs.pop('exception', ImproperlyConfigured)
+        self._url_cache = {}
+        # opt-in memoization of get(), only safe if the environment is not modified externally
+        self._get_cache = {} if kwargs.pop('cache', False) else None
         super(DjangoEnv, self).__init__(*args, exception=exception, **kwargs)
 
+    @classmethod
+    def _int(cls, val):
+        if isinstance(val, int):
+            return val
+        if not val:
+            return 0
+        try:
+            return int(val)
+        except (TypeError, ValueError):
+            return 0
+
+    @classmethod
+    def _float(cls, val):
+        if isinstance(val, float):
+            return val
+        if not val:
+            return 0
+        try:
+            return float(val)
+        except (TypeError, ValueError):
+            return 0
+
+    def _clear_cache(self):
+        if self._get_cache:
+            self._get_cache.clear()
+        # parsed urls are keyed by value so remain correct, but drop them to avoid unbounded growth
+        self._url_cache.clear()
+
+    def read_env(self, **kwargs):
+        self._clear_cache()
+        super().read_env(**kwargs)
+
+    def set(self, var, value=None):
+        self._clear_cache()
+        super().set(var, value)
+
+    def setdefault(self, var, value):
+        self._clear_cache()
+        return super().setdefault(var, value)
+
+    def unset(self, var):
+        self._clear_cache()
+        super().unset(var)
+
     def get(self, var, default=None, prefix=_DEFAULT_PREFIX):
         if prefix is _DEFAULT_PREFIX:
             prefix = self.prefix
+        if self._get_cache is None:
+            return super().get(self._prefixed(var, prefix), default)
+        # cache prefix resolution and the raw lookup together, default is applied per call
+        key = (var, prefix)
+        try:
+            value = self._get_cache[key]
+        except KeyError:
+            value = self._get_cache[key] = super().get(self._prefixed(var, prefix), _MISSING)
+        return default if value is _MISSING else value
+
+    def _prefixed(self, var, prefix):
         if var and prefix and not var.startswith(prefix) and not self.is_set(var):
-            var = f"{prefix}{var}"
-        return super().get(var, default)
+            return f"{prefix}{var}"
+        return var
 
     def check_var(self, var, default=None, raise_error=True):
         """
@@ -128,20 +317,29 @@ class DjangoEnv(Env):
     def __call__(self, var=None, default=None, prefix=_DEFAULT_PREFIX, optional=False, raise_error=False):
         # This is tied to django-class-settings (optional dependency), which allows
         # omitting the 'name' parameter and using the setting name instead'
-        if var is None:
-            try:
-                # noinspection PyUnresolvedReferences
-                from class_settings.env import DeferredEnv
-
-                kwargs = {"name": var, "prefix": prefix if prefix is None else self.prefix, "default": default}
-                return DeferredEnv(self, kwargs=kwargs, optional=optional)
-            except ImportError:
-                # class settings not installed
-                pass
+        if var is None and DeferredEnv is not None:
+            kwargs = {"name": var, "prefix": prefix if prefix is None else self.prefix, "default": default}
+            return DeferredEnv(self, kwargs=kwargs, optional=optional)
         if raise_error and not self.is_set(var):
             self.exception(f"Expected '{var}' is not set in environment")
         return self.get(var, prefix=None, default=default)
 
+    def _cached_url(self, parser, url, override):
+        """
+        Memoize the result of a url parser, keyed on the resolved url value and
+        override, so changing the variable's value always results in a re-parse
+
+        :param parser: bound method that parses url into a configuration dictionary
+        :param url: url value to parse
+        :param override: engine or backend override
+        :return: copy of the parsed configuration dictionary
+        """
+        key = (parser.__name__, url, override)
+        config = self._url_cache.get(key)
+        if config is None:
+            config = self._url_cache[key] = parser(url, override)
+        return _copy_config(config)
+
     # Django-specific additions
 
     def database_url(self, var=DEFAULT_DATABASE_ENV, *, default=None, engine=None, options=None):
@@ -155,19 +353,18 @@ class DjangoEnv(Env):
         :return: dictionary of database options
         """
         url = self.check_var(var, default=default)
+        config = self._cached_url(self._database_url, url, engine)
+        return _apply_options(config, options, _DB_BASE_OPTIONS) if options else config
+
+    def _database_url(self, url, engine):
         # shortcut to avoid urlparse
         if url == 'sqlite://:memory':
-            return {
-                'ENGINE': DB_SCHEMES['sqlite'],
-                'NAME': ':memory:'
-            }
+            return dict(_SQLITE_MEMORY_CONFIG)
 
         # otherwise parse the url as normal
-        config = {}
-        url = urlparse(url)
+        url, params = _split_url(url)
 
-        path = smart_str(url.path[1:])
-        path = unquote_plus(path.split('?', 2)[0])
+        path = _url_path(url)
 
         if url.scheme == 'sqlite' and path == '':
             path = ':memory:'
@@ -178,7 +375,7 @@ class DjangoEnv(Env):
 
         # Handle postgres percent-encoded paths.
         hostname = url.hostname or ''
-        if '%2f' in hostname.lower():
+        if '%2f' in hostname or '%2F' in hostname:
             # Switch to url.netloc to avoid lower cased paths
             hostname = url.netloc
             if "@" in hostname:
@@ -190,14 +387,13 @@ class DjangoEnv(Env):
         engine = DB_SCHEMES[url.scheme] if engine is None else engine
         port = (str(url.port) if url.port and engine == DB_SCHEMES['oracle'] else url.port)
 
-        # Update with configuration.
-        config.update({
+        config = {
             'NAME': path or '',
             'USER': url.username or '',
             'PASSWORD': url.password or '',
             'HOST': hostname,
             'PORT': port or ''
-        })
+        }
 
         if url.scheme == 'postgres' and path.startswith('/'):
             config['HOST'], config['NAME'] = path.rsplit('/', 1)
@@ -210,31 +406,16 @@ class DjangoEnv(Env):
             else:
                 config['PORT'] = str(config['PORT'])
 
-        db_options = {}
         # Pass the query string into OPTIONS.
-        if url.query:
-            for key, values in parse_qs(url.query).items():
-                if key.upper() in _DB_BASE_OPTIONS:
-                    config.update({key.upper(): values[0]})
-                else:
-                    db_options.update({key: self._int(values[0])})
-
-            # Support for Postgres Schema URLs
-            if 'currentSchema' in db_options and engine in (
-                'django.contrib.gis.db.backends.postgis',
-                'django.db.backends.postgresql_psycopg2',
-                'django_redshift_backend',
-            ):
-                db_options['options'] = '-c search_path={0}'.format(db_options.pop('currentSchema'))
+        base, db_options = _split_query(params, _DB_BASE_OPTIONS, self._int)
+        config.update(base)
+
+        # Support for Postgres Schema URLs
+        if 'CURRENTSCHEMA' in db_options and engine in _PG_SCHEMA_ENGINES:
+            db_options['OPTIONS'] = '-c search_path={0}'.format(db_options.pop('CURRENTSCHEMA'))
 
-        if options:
-            for key, value in options.items():
-                if key.upper() in _DB_BASE_OPTIONS:
-                    config.update({key.upper(): value})
-                else:
-                    db_options.update({key: value})
         if db_options:
-            config['OPTIONS'] = {k.upper(): v for k, v in db_options.items()}
+            config['OPTIONS'] = db_options
         if engine:
             config['ENGINE'] = engine
         return config
@@ -248,43 +429,34 @@ class DjangoEnv(Env):
         :param options: additional options
         :return: dictionary of cache parameters
         """
-        url = urlparse(self.check_var(var, default=default))
+        url = self.check_var(var, default=default)
+        config = self._cached_url(self._cache_url, url, backend)
+        return _apply_options(config, options) if options else config
 
-        location = url.netloc.split(',')
-        if len(location) == 1:
-            location = location[0]
+    def _cache_url(self, url, backend):
+        url, params = _split_url(url)
 
+        netlocs = url.netloc.split(',')
         config = {
             'BACKEND': backend if backend else CACHE_SCHEMES[url.scheme],
-            'LOCATION': location,
+            'LOCATION': netlocs[0] if len(netlocs) == 1 else netlocs,
         }
 
         # Add the drive to LOCATION
         if url.scheme == 'filecache':
-            config.update({
-                'LOCATION': url.netloc + url.path,
-            })
+            config['LOCATION'] = url.netloc + url.path
 
-        if url.path and url.scheme in ['unix', 'memcache', 'pymemcache']:
-            config.update({
-                'LOCATION': f'unix:{url.path}',
-            })
+        if url.path and url.scheme in _CACHE_UNIX_SCHEMES:
+            config['LOCATION'] = f'unix:{url.path}'
         elif url.scheme.startswith('redis'):
             scheme = url.scheme.replace('cache', '') if url.hostname else 'unix'
-            locations = [f'{scheme}://{smart_str(loc)}{url.path}' for loc in url.netloc.split(',')]
-            config['LOCATION'] = locations[0] if len(locations) == 1 else locations
-
-        cache_options = {}
-        if url.query:
-            for key, values in parse_qs(url.query).items():
-                opt = {smart_str(key).upper(): smart_str(values[0], strings_only=True)}
-                if key.upper() in _CACHE_BASE_OPTIONS:
-                    config.update(opt)
-                else:
-                    cache_options.update(opt)
+            if len(netlocs) == 1:
+                config['LOCATION'] = f'{scheme}://{netlocs[0]}{url.path}'
+            else:
+                config['LOCATION'] = [f'{scheme}://{loc}{url.path}' for loc in netlocs]
 
-        if options:
-            cache_options.update({k.upper(): v for k, v in options.items()})
+        base, cache_options = _split_query(params, _CACHE_BASE_OPTIONS)
+        config.update(base)
         config['OPTIONS'] = cache_options
         return config
 
@@ -296,10 +468,14 @@ class DjangoEnv(Env):
         :param options: specify email options (as dict)
         :return: dictionary of email variables
         """
-        url = urlparse(self.check_var(var, default=default))
+        url = self.check_var(var, default=default)
+        config = self._cached_url(self._email_url, url, backend)
+        return _apply_options(config, options) if options else config
 
-        path = smart_str(url.path[1:])
-        path = unquote_plus(path.split('?', 2)[0])
+    def _email_url(self, url, backend):
+        url, params = _split_url(url)
+
+        path = _url_path(url)
 
         # Update with environment configuration
         config = {
@@ -317,24 +493,15 @@ class DjangoEnv(Env):
         else:
             raise self.exception('Invalid email schema %s' % url.scheme)
 
-        if url.scheme in ('smtps', 'smtp+tls'):
-            config['EMAIL_USE_TLS'] = True
-        elif url.scheme == 'smtp+ssl':
-            config['EMAIL_USE_SSL'] = True
-
-        email_options = {}
-        if url.query:
-            for key, values in parse_qs(url.query).items():
-                opt = {smart_str(key).upper(): self._int(values[0])}
-                if key.upper() in _EMAIL_BASE_OPTIONS:
-                    config.update(opt)
-                else:
-                    email_options.update(opt)
+        secure = _EMAIL_SECURE_SCHEMES.get(url.scheme)
+        if secure:
+            config[secure] = True
 
-        if options:
-            email_options.update(options)
+        base, email_options = _split_query(params, _EMAIL_BASE_OPTIONS, self._int)
+        for key, value in base.items():
+            config[key] = self._int(value)
         if email_options:
-            config['OPTIONS'] = {k.upper(): v for k, v in email_options.items()}
+            config['OPTIONS'] = email_options
 
         return config
 
@@ -346,10 +513,17 @@ class DjangoEnv(Env):
         :param options: specify storage options (as dict)
         :return: dictionary of storage variables
         """
-        url = urlparse(self.check_var(var, default=default))
+        url = self.check_var(var, default=default)
+        config = self._cached_url(self._search_url, url, engine)
+        if options:
+            for key, value in options.items():
+                config[key.upper()] = value
+        return config
 
-        path = smart_str(url.path[1:])
-        path = unquote_plus(path.split('?', 2)[0])
+    def _search_url(self, url, engine):
+        url, params = _split_url(url)
+
+        path = _url_path(url)
 
         if url.scheme not in SEARCH_SCHEMES:
             raise self.exception('Invalid search schema %s' % url.scheme)
@@ -359,33 +533,31 @@ class DjangoEnv(Env):
         }
 
         # check common params
-        params = {}
-        if url.query:
-            params = {smart_str(k): smart_str(v, strings_only=True) for k, v in parse_qs(url.query)}
-            if 'EXCLUDED_INDEXES' in params.keys():
-                config['EXCLUDED_INDEXES'] = params['EXCLUDED_INDEXES'][0].split(',')
-            if 'INCLUDE_SPELLING' in params.keys():
-                config['INCLUDE_SPELLING'] = self.is_true(params['INCLUDE_SPELLING'][0])
-            if 'BATCH_SIZE' in params.keys():
-                config['BATCH_SIZE'] = self._int(params['BATCH_SIZE'][0])
+        if params:
+            if 'EXCLUDED_INDEXES' in params:
+                config['EXCLUDED_INDEXES'] = params['EXCLUDED_INDEXES'].split(',')
+            if 'INCLUDE_SPELLING' in params:
+                config['INCLUDE_SPELLING'] = self.is_true(params['INCLUDE_SPELLING'])
+            if 'BATCH_SIZE' in params:
+                config['BATCH_SIZE'] = self._int(params['BATCH_SIZE'])
 
         if url.scheme == 'simple':
             return config
-        elif url.scheme in ['solr', 'elasticsearch', 'elasticsearch2']:
-            if 'KWARGS' in params.keys():
-                config['KWARGS'] = params['KWARGS'][0]
+        elif url.scheme == 'solr' or url.scheme in _ELASTIC_SCHEMES:
+            if 'KWARGS' in params:
+                config['KWARGS'] = params['KWARGS']
 
         # remove trailing slash
         if path.endswith("/"):
             path = path[:-1]
 
         if url.scheme == 'solr':
-            config['URL'] = urlunparse(('http',) + url[1:2] + (path,) + ('', '', ''))
-            if 'TIMEOUT' in params.keys():
-                config['TIMEOUT'] = self._int(params['TIMEOUT'][0])
+            config['URL'] = _http_url(url.netloc, path)
+            if 'TIMEOUT' in params:
+                config['TIMEOUT'] = self._int(params['TIMEOUT'])
             return config
 
-        if url.scheme.startswith('elasticsearch'):
+        if url.scheme in _ELASTIC_SCHEMES:
             split = path.rsplit("/", 1)
 
             if len(split) > 1:
@@ -395,24 +567,21 @@ class DjangoEnv(Env):
                 path = ""
                 index = split[0]
 
-            config['URL'] = urlunparse(('http',) + url[1:2] + (path,) + ('', '', ''))
-            if 'TIMEOUT' in params.keys():
-                config['TIMEOUT'] = self._int(params['TIMEOUT'][0])
+            config['URL'] = _http_url(url.netloc, path)
+            if 'TIMEOUT' in params:
+                config['TIMEOUT'] = self._int(params['TIMEOUT'])
             config['INDEX_NAME'] = index
         else:
             config['PATH'] = '/' + path
 
             if url.scheme == 'whoosh':
-                if 'STORAGE' in params.keys():
-                    config['STORAGE'] = params['STORAGE'][0]
-                if 'POST_LIMIT' in params.keys():
-                    config['POST_LIMIT'] = self._int(params['POST_LIMIT'][0])
+                if 'STORAGE' in params:
+                    config['STORAGE'] = params['STORAGE']
+                if 'POST_LIMIT' in params:
+                    config['POST_LIMIT'] = self._int(params['POST_LIMIT'])
             elif url.scheme == 'xapian':
-                if 'FLAGS' in params.keys():
-                    config['FLAGS'] = params['FLAGS'][0]
-
-        if options:
-            config.update({k.upper(): v for k, v in options.items()})
+                if 'FLAGS' in params:
+                    config['FLAGS'] = params['FLAGS']
 
         return config
 
@@ -426,12 +595,14 @@ class DjangoEnv(Env):
         :return: dictionary of queue variables
         """
         url = self.check_var(var, default=default)
+        config = self._cached_url(self._queue_url, url, backend)
+        return _apply_options(config, options) if options else config
 
+    def _queue_url(self, url, backend):
         # otherwise parse the url as normal
-        url = urlparse(url)
+        url, params = _split_url(url)
 
-        path = smart_str(url.path[1:])
-        path = unquote_plus(path.split('?', 2)[0])
+        path = _url_path(url)
 
         conf = QUEUE_SCHEMES.get(url.scheme, {})
         port = int(url.port) if url.port else conf.get('default-port', None)
@@ -444,9 +615,7 @@ class DjangoEnv(Env):
             path = f'https://{url.hostname}'
             if port:
                 path += f':{port}'
-            config.update({
-                'AWS_SQS_ENDPOINT': path
-            })
+            config['AWS_SQS_ENDPOINT'] = path
 
         elif url.scheme.startswith('rabbit'):
             config = {
@@ -465,9 +634,7 @@ class DjangoEnv(Env):
             scheme = url.scheme if url.hostname else 'unix'
             locations = [f"{scheme}://{loc}{url.path}" for loc in url.netloc.split(',')]
             if not backend:
-                config.update({
-                    'QUEUE_LOCATION': locations[0] if len(locations) == 1 else locations
-                })
+                config['QUEUE_LOCATION'] = locations[0] if len(locations) == 1 else locations
 
         else:
             config.update({
@@ -482,19 +649,10 @@ class DjangoEnv(Env):
                 'PASSWORD': url.password or '',
             })
 
-        queue_options = {}
-        if url.query:
-            for key, values in parse_qs(url.query).items():
-                opt = {smart_str(key).upper(): smart_str(values[0], strings_only=True)}
-                if key.upper() in _QUEUE_BASE_OPTIONS:
-                    config.update(opt)
-                else:
-                    queue_options.update(opt)
-
-        if options:
-            queue_options.update(options)
+        base, queue_options = _split_query(params, _QUEUE_BASE_OPTIONS)
+        config.update(base)
         if queue_options:
-            config['OPTIONS'] = {k.upper(): v for k, v in queue_options.items()}
+            config['OPTIONS'] = queue_options
 
         # return configuration.
         return config